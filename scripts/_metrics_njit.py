@@ -0,0 +1,188 @@
+"""Numba kernel computing per-ticker screening metrics over (T, N) panels.
+
+Opt-in alternative to ``jp_screen._compute_all_numpy`` (``jp_screen.py
+--numba``). Falls back to plain Python when numba is not installed; callers
+should check ``NUMBA_AVAILABLE`` and use the NumPy path in that case.
+
+Run ``python scripts/_metrics_njit.py`` to check both paths agree.
+"""
+import sys
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+# Enough valid closes for the 250d return and MA200 twenty days back
+_CLOSE_DEPTH = 251
+_HIGH_DEPTH = 252
+
+
+@njit(cache=True)
+def _ret(buf, n, k):
+    if n <= k or buf[k] == 0.0:
+        return np.nan
+    return buf[0] / buf[k] - 1.0
+
+
+@njit(cache=True, parallel=True)
+def compute_all(close, high, vol):
+    """Return metric arrays for every column of the ``(T, N)`` panels.
+
+    NaN rows are skipped per ticker (like ``dropna``) for ``close``/``high``
+    and counted as zero for ``vol``. Returns, in order: n_valid, last_close,
+    ret_5, ret_20, ret_60, ret_120, ret_250, above_ma20, above_ma50,
+    above_ma200, ma200_slope_20d, prox_20h, prox_52wh, vol_ratio_10_20.
+    """
+    T, N = close.shape
+    n_valid = np.zeros(N, dtype=np.int64)
+    last_close = np.full(N, np.nan)
+    ret_5 = np.full(N, np.nan)
+    ret_20 = np.full(N, np.nan)
+    ret_60 = np.full(N, np.nan)
+    ret_120 = np.full(N, np.nan)
+    ret_250 = np.full(N, np.nan)
+    above_ma20 = np.zeros(N, dtype=np.bool_)
+    above_ma50 = np.zeros(N, dtype=np.bool_)
+    above_ma200 = np.zeros(N, dtype=np.bool_)
+    ma200_slope = np.full(N, np.nan)
+    prox_20h = np.full(N, np.nan)
+    prox_52wh = np.full(N, np.nan)
+    vol_ratio = np.full(N, np.nan)
+
+    for j in prange(N):
+        # Most recent valid closes, newest first
+        buf = np.empty(_CLOSE_DEPTH)
+        n = 0
+        for i in range(T - 1, -1, -1):
+            v = close[i, j]
+            if not np.isnan(v):
+                if n < _CLOSE_DEPTH:
+                    buf[n] = v
+                n += 1
+        n_valid[j] = n
+        if n == 0:
+            continue
+
+        last = buf[0]
+        last_close[j] = last
+        ret_5[j] = _ret(buf, n, 5)
+        ret_20[j] = _ret(buf, n, 20)
+        ret_60[j] = _ret(buf, n, 60)
+        ret_120[j] = _ret(buf, n, 120)
+        ret_250[j] = _ret(buf, n, 250)
+
+        # One pass of prefix sums serves every moving average
+        s = 0.0
+        s20 = s50 = s200 = s220 = np.nan
+        for k in range(min(n, 220)):
+            s += buf[k]
+            if k == 19:
+                s20 = s
+            elif k == 49:
+                s50 = s
+            elif k == 199:
+                s200 = s
+            elif k == 219:
+                s220 = s
+        above_ma20[j] = last > s20 / 20.0
+        above_ma50[j] = last > s50 / 50.0
+        above_ma200[j] = last > s200 / 200.0
+        ma200_slope[j] = s200 / (s220 - s20) - 1.0
+
+        h20 = np.nan
+        h252 = np.nan
+        m = 0
+        for i in range(T - 1, -1, -1):
+            h = high[i, j]
+            if np.isnan(h):
+                continue
+            if m == 0 or h > h252:
+                h252 = h
+            m += 1
+            if m == 20:
+                h20 = h252
+            if m == _HIGH_DEPTH:
+                break
+        if h20 > 0:
+            prox_20h[j] = last / h20
+        if h252 > 0:
+            prox_52wh[j] = last / h252
+
+        v10 = 0.0
+        v20 = 0.0
+        for i in range(max(T - 20, 0), T):
+            v = vol[i, j]
+            if not np.isnan(v):
+                v20 += v
+                if i >= T - 10:
+                    v10 += v
+        v10 /= min(T, 10)
+        v20 /= min(T, 20)
+        if v20 > 0:
+            vol_ratio[j] = v10 / v20
+
+    return (
+        n_valid, last_close, ret_5, ret_20, ret_60, ret_120, ret_250,
+        above_ma20, above_ma50, above_ma200,
+        ma200_slope, prox_20h, prox_52wh, vol_ratio,
+    )
+
+
+def _parity_panels(T: int = 520, N: int = 300, seed: int = 0):
+    """Synthetic gappy panels: late listings, sporadic NaN rows, missing last bars."""
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (T, N)), axis=0))
+    high = close * (1 + np.abs(rng.normal(0, 0.01, (T, N))))
+    vol = rng.integers(100_000, 5_000_000, (T, N)).astype(float)
+    listed = rng.integers(0, T, N)
+    listed[: N // 2] = 0
+    for j in range(N):
+        close[: listed[j], j] = high[: listed[j], j] = vol[: listed[j], j] = np.nan
+    close[rng.random((T, N)) < 0.01] = np.nan
+    high[rng.random((T, N)) < 0.01] = np.nan
+    vol[rng.random((T, N)) < 0.01] = np.nan
+    close[-1, ::11] = np.nan
+    panels = {"Close": close, "High": high, "Volume": vol}
+    return {k: np.asfortranarray(v, dtype=np.float32) for k, v in panels.items()}
+
+
+def check_parity(seeds: int = 3) -> bool:
+    """Compare compute_all against jp_screen's NumPy path on synthetic data."""
+    from jp_screen import METRICS_DTYPE, _compute_all_numpy
+
+    names = ("n_valid",) + METRICS_DTYPE.names[1:]
+    ok = True
+    for seed in range(seeds):
+        panels = _parity_panels(seed=seed)
+        ref = _compute_all_numpy(panels)
+        got = compute_all(panels["Close"], panels["High"], panels["Volume"])
+        for name, a, b in zip(names, ref, got):
+            if not np.allclose(a, b, rtol=1e-5, equal_nan=True):
+                bad = np.flatnonzero(~np.isclose(a, b, rtol=1e-5, equal_nan=True))
+                print(f"seed {seed}: {name} differs at columns {bad[:10].tolist()}", file=sys.stderr)
+                ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    if not NUMBA_AVAILABLE:
+        print("numba not installed; checking the pure-Python kernel.", file=sys.stderr)
+    ok = check_parity()
+    print("compute_all matches the NumPy path." if ok else "compute_all and the NumPy path disagree.")
+    sys.exit(0 if ok else 1)
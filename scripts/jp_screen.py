@@ -1,108 +1,109 @@
 #!/usr/bin/env python3
 import argparse
+import importlib.util
 import math
+import os
 import re
 import sys
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from io import BytesIO, StringIO
-from typing import Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 
 
 NIKKEI_COMPONENT_URL = "https://indexes.nikkei.co.jp/en/nkave/index/component?idx=nk225"
 JPX_LIST_URL = "https://www.jpx.co.jp/english/markets/statistics-equities/misc/tvdivq0000001vg2-att/data_e.xls"
 JPX_LIST_JA_URL = "https://www.jpx.co.jp/markets/statistics-equities/misc/tvdivq0000001vg2-att/data_j.xls"
 
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0 Safari/537.36"
+)
+
+# Per-ticker OHLCV cache (Parquet); override with JP_SCREEN_CACHE
+CACHE_DIR = Path(os.environ.get("JP_SCREEN_CACHE", "~/.cache/jp_screen")).expanduser()
+MARKET_TZ = "Asia/Tokyo"
+# Concurrent Yahoo Finance requests; same as yfinance's own threads=True default
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+SESSION_CLOSE = pd.Timedelta(hours=15, minutes=30)
+
 # Near-high thresholds
 NEAR_20D = 0.99
 NEAR_52W = 0.97
 
 
 
-def _normalize_code(code: str) -> Optional[str]:
-    code = code.strip()
-    m = re.search(r"(\d{4})", code)
-    if not m:
-        return None
-    return m.group(1)
+def _make_session() -> requests.Session:
+    """Shared HTTP session: one connection pool and retry policy for all fetches."""
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+
+_SESSION = _make_session()
+
+
+_CODE_RE = re.compile(r"(\d{4})")
+
+
+def _universe_from_frame(df: pd.DataFrame, code_col: str, name_col: str) -> Tuple[List[str], Dict[str, str]]:
+    """Extract ``NNNN.T`` tickers and names from a listing table, first row wins."""
+    codes = df[code_col].astype(str).str.extract(_CODE_RE, expand=False)
+    mask = df[code_col].notna() & df[name_col].notna() & codes.notna()
+    tickers = codes[mask] + ".T"
+    names = df.loc[mask, name_col].astype(str)
+    keep = ~tickers.duplicated()
+    tickers = tickers[keep].tolist()
+    return tickers, dict(zip(tickers, names[keep]))
 
 
 
 def fetch_nikkei225_universe() -> Tuple[List[str], Dict[str, str]]:
     """Fetch Nikkei 225 tickers and names from Nikkei's official site."""
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/124.0 Safari/537.36"
-        )
-    }
-    resp = requests.get(NIKKEI_COMPONENT_URL, headers=headers, timeout=20)
+    resp = _SESSION.get(NIKKEI_COMPONENT_URL, timeout=20)
     resp.raise_for_status()
     tables = pd.read_html(StringIO(resp.text))
 
-    tickers: List[str] = []
-    name_map: Dict[str, str] = {}
-
-    for df in tables:
-        if "Code" not in df.columns or "Company Name" not in df.columns:
-            continue
-        for _, row in df.iterrows():
-            code = row.get("Code")
-            name = row.get("Company Name")
-            if pd.isna(code) or pd.isna(name):
-                continue
-            normalized = _normalize_code(str(code))
-            if not normalized:
-                continue
-            ticker = f"{normalized}.T"
-            if ticker in name_map:
-                continue
-            name_map[ticker] = str(name)
-            tickers.append(ticker)
-
-    return tickers, name_map
+    frames = [
+        df[["Code", "Company Name"]]
+        for df in tables
+        if "Code" in df.columns and "Company Name" in df.columns
+    ]
+    if not frames:
+        return [], {}
+    return _universe_from_frame(pd.concat(frames, ignore_index=True), "Code", "Company Name")
 
 
 
 def fetch_prime_universe() -> Tuple[List[str], Dict[str, str]]:
     """Fetch Tokyo Stock Exchange Prime Market tickers."""
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/124.0 Safari/537.36"
-        )
-    }
-    resp = requests.get(JPX_LIST_URL, headers=headers, timeout=30)
+    resp = _SESSION.get(JPX_LIST_URL, timeout=30)
     resp.raise_for_status()
-    df = pd.read_excel(BytesIO(resp.content), engine="xlrd")
-
-    prime_mask = df["Section/Products"].astype(str).str.contains("Prime Market", na=False)
-    prime_df = df[prime_mask]
-
-    tickers: List[str] = []
-    name_map: Dict[str, str] = {}
+    df = pd.read_excel(
+        BytesIO(resp.content),
+        engine="xlrd",
+        usecols=["Local Code", "Name (English)", "Section/Products"],
+        dtype={"Local Code": "string", "Section/Products": "category"},
+    )
 
-    for _, row in prime_df.iterrows():
-        code = row.get("Local Code")
-        name = row.get("Name (English)")
-        if pd.isna(code) or pd.isna(name):
-            continue
-        normalized = _normalize_code(str(code))
-        if not normalized:
-            continue
-        ticker = f"{normalized}.T"
-        if ticker in name_map:
-            continue
-        name_map[ticker] = str(name)
-        tickers.append(ticker)
+    # Match on the handful of distinct sections, then select rows by category
+    sections = df["Section/Products"].cat.categories
+    prime_sections = sections[sections.astype(str).str.contains("Prime Market")]
+    prime_df = df[df["Section/Products"].isin(prime_sections)]
 
-    return tickers, name_map
+    return _universe_from_frame(prime_df, "Local Code", "Name (English)")
 
 
 def fetch_jpx_japanese_names() -> Dict[str, str]:
@@ -111,14 +112,7 @@ def fetch_jpx_japanese_names() -> Dict[str, str]:
     Falls back silently if JPX endpoint is unavailable.
     """
     try:
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0 Safari/537.36"
-            )
-        }
-        resp = requests.get(JPX_LIST_JA_URL, headers=headers, timeout=30)
+        resp = _SESSION.get(JPX_LIST_JA_URL, timeout=30)
         resp.raise_for_status()
         df = pd.read_excel(BytesIO(resp.content), engine="xlrd")
         mapping: Dict[str, str] = {}
@@ -146,212 +140,424 @@ def chunked(seq: List[str], size: int) -> Iterable[List[str]]:
         yield seq[i : i + size]
 
 
-@dataclass
-class Metrics:
-    ticker: str
-    name: str
-    last_close: float
-    ret_5: float
-    ret_20: float
-    ret_60: float
-    ret_120: float
-    ret_250: float
-    above_ma20: bool
-    above_ma50: bool
-    above_ma200: bool
-    ma200_slope_20d: float
-    prox_20h: float
-    prox_52wh: float
-    vol_ratio_10_20: float
-
-
-def _safe_pct(a: pd.Series, n: int) -> float:
-    try:
-        if len(a) <= n:
-            return np.nan
-        old = a.iloc[-(n + 1)]
-        new = a.iloc[-1]
-        if old == 0 or np.isnan(old) or np.isnan(new):
-            return np.nan
-        return (new / old) - 1.0
-    except Exception:
-        return np.nan
+# One record per ticker; field order matches the compute_all kernels' outputs
+METRICS_DTYPE = np.dtype([
+    ("ticker", "U12"),
+    ("last_close", "f4"),
+    ("ret_5", "f4"),
+    ("ret_20", "f4"),
+    ("ret_60", "f4"),
+    ("ret_120", "f4"),
+    ("ret_250", "f4"),
+    ("above_ma20", "?"),
+    ("above_ma50", "?"),
+    ("above_ma200", "?"),
+    ("ma200_slope_20d", "f4"),
+    ("prox_20h", "f4"),
+    ("prox_52wh", "f4"),
+    ("vol_ratio_10_20", "f4"),
+])
+METRIC_FIELDS = METRICS_DTYPE.names[1:]
+
+MIN_HISTORY = 250
+PANEL_FIELDS = ("Close", "High", "Volume")
+
+# Field name -> (T, N) float32 array, one column per ticker
+Panels = Dict[str, np.ndarray]
+
+
+def build_panels(frames: Dict[str, pd.DataFrame], tickers: List[str]) -> Tuple[Panels, Dict[str, int]]:
+    """Fill per-field panels from per-ticker bars, plus a ticker -> column map.
+
+    Rows are the union of all tickers' dates; tickers without bars come back
+    as all-NaN columns.
+    """
+    ticker_idx = {t: i for i, t in enumerate(dict.fromkeys(tickers))}
+    frames = {t: df for t, df in frames.items() if t in ticker_idx}
+    if frames:
+        dates = pd.DatetimeIndex(np.unique(np.concatenate([df.index.to_numpy() for df in frames.values()])))
+    else:
+        dates = pd.DatetimeIndex([])
 
+    # Column-major so each ticker's series is contiguous
+    shape = (len(dates), len(ticker_idx))
+    panels = {field: np.full(shape, np.nan, dtype=np.float32, order="F") for field in PANEL_FIELDS}
+    for t, df in frames.items():
+        rows = dates.get_indexer(df.index)
+        for field in PANEL_FIELDS:
+            if field in df.columns:
+                panels[field][rows, ticker_idx[t]] = df[field].to_numpy(dtype=np.float32)
+    return panels, ticker_idx
 
-def compute_metrics_for_ticker(df: pd.DataFrame, ticker: str, name: str) -> Optional[Metrics]:
-    try:
-        if isinstance(df.columns, pd.MultiIndex):
-            if ticker not in df.columns.get_level_values(0):
-                return None
-            sub = df[ticker].copy()
-        else:
-            # Single ticker result
-            sub = df.copy()
 
-        # Require basic columns
-        required = ["Close", "High", "Volume"]
-        if not all(col in sub.columns for col in required):
-            return None
+def _compact(panel: np.ndarray) -> np.ndarray:
+    """Column-wise ``dropna``: move each column's valid rows to the bottom.
+
+    Valid values keep their order and NaNs are pushed to the top, so ``[-k]``
+    indexes the k-th most recent valid observation of every ticker at once.
+    """
+    valid = ~np.isnan(panel)
+    # Only columns with a gap after their first valid row need reordering;
+    # gaps before a listing date are already in place
+    gappy = np.flatnonzero((valid[1:] < valid[:-1]).any(axis=0))
+    if not len(gappy):
+        return panel
+    sub = panel[:, gappy]
+    order = np.argsort(valid[:, gappy], axis=0, kind="stable")
+    out = panel.copy(order="F")
+    out[:, gappy] = np.take_along_axis(sub, order, axis=0)
+    return out
 
-        close = sub["Close"].dropna()
-        high = sub["High"].dropna()
-        vol = sub["Volume"].fillna(0)
 
-        if len(close) < 250:
-            return None
+def _safe_pct(a: np.ndarray, n: int) -> np.ndarray:
+    """Return per-column ``a[-1] / a[-(n + 1)] - 1`` (NaN when undefined)."""
+    if a.shape[0] <= n:
+        return np.full(a.shape[1], np.nan)
+    old = a[-(n + 1)].astype(np.float64)
+    new = a[-1].astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(old != 0, new / old - 1.0, np.nan)
 
-        last_close = float(close.iloc[-1])
-        ma20 = close.rolling(20).mean()
-        ma50 = close.rolling(50).mean()
-        ma200 = close.rolling(200).mean()
 
-        above_ma20 = bool(last_close > float(ma20.iloc[-1]))
-        above_ma50 = bool(last_close > float(ma50.iloc[-1]))
-        above_ma200 = bool(last_close > float(ma200.iloc[-1]))
+def _tail_csum(arr: np.ndarray, depth: int) -> np.ndarray:
+    """Column-wise prefix sums of the last ``depth`` rows, with a leading zero row.
 
-        ret_5 = _safe_pct(close, 5)
-        ret_20 = _safe_pct(close, 20)
-        ret_60 = _safe_pct(close, 60)
-        ret_120 = _safe_pct(close, 120)
-        ret_250 = _safe_pct(close, 250) if len(close) > 250 else np.nan
+    NaNs are summed as zero; ``_tail_sma`` masks windows that reach them.
+    """
+    tail = np.nan_to_num(arr[-depth:], nan=0.0)
+    csum = np.zeros((tail.shape[0] + 1,) + tail.shape[1:])
+    np.cumsum(tail, axis=0, dtype=np.float64, out=csum[1:])
+    return csum
 
-        # 20d high proximity
-        high20 = float(high.rolling(20).max().iloc[-1])
-        prox_20h = last_close / high20 if high20 > 0 else np.nan
 
-        # 52w high proximity
-        window_252 = min(252, len(high))
-        high252 = float(high.tail(window_252).max())
-        prox_52wh = last_close / high252 if high252 > 0 else np.nan
+def _tail_sma(csum: np.ndarray, n_valid: np.ndarray, w: int, offset: int = 0) -> np.ndarray:
+    """Mean of the ``w`` rows ending ``offset`` rows from the end, from ``_tail_csum``.
+
+    Equivalent to ``rolling(w).mean().iloc[-1 - offset]`` on a ``_compact``-ed
+    panel via two lookups: with NaNs only at the top, the window is complete
+    exactly when the column has at least ``w + offset`` valid rows.
+    """
+    if csum.shape[0] <= w + offset:
+        return np.full(csum.shape[1:], np.nan)
+    mean = (csum[-1 - offset] - csum[-1 - offset - w]) / w
+    return np.where(n_valid >= w + offset, mean, np.nan)
+
+
+def _compute_all_numpy(panels: Panels) -> Tuple[np.ndarray, ...]:
+    """NumPy counterpart of ``_metrics_njit.compute_all`` (same outputs, same order)."""
+    close = _compact(panels["Close"])
+    high = _compact(panels["High"])
+    vol = np.nan_to_num(panels["Volume"], nan=0.0)
+
+    n_close = (~np.isnan(close)).sum(axis=0)
+    last_close = close[-1].astype(np.float64)
+    # One prefix sum covers MA20/50/200 and MA200 twenty bars back
+    csum = _tail_csum(close, 220)
+    ma200 = _tail_sma(csum, n_close, 200)
+
+    above_ma20 = last_close > _tail_sma(csum, n_close, 20)
+    above_ma50 = last_close > _tail_sma(csum, n_close, 50)
+    above_ma200 = last_close > ma200
+
+    ret_5 = _safe_pct(close, 5)
+    ret_20 = _safe_pct(close, 20)
+    ret_60 = _safe_pct(close, 60)
+    ret_120 = _safe_pct(close, 120)
+    ret_250 = _safe_pct(close, 250)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 20d high proximity (NaN unless 20 valid highs exist)
+        high20 = high[-20:].max(axis=0).astype(np.float64)
+        prox_20h = np.where(high20 > 0, last_close / high20, np.nan)
+
+        # 52w high proximity (fmax skips NaN without nanmax's all-NaN warning)
+        high252 = np.fmax.reduce(high[-252:], axis=0).astype(np.float64)
+        prox_52wh = np.where(high252 > 0, last_close / high252, np.nan)
 
         # Volume ratio (10d vs 20d)
-        v10 = float(vol.tail(10).mean())
-        v20 = float(vol.tail(20).mean())
-        vol_ratio = (v10 / v20) if v20 > 0 else np.nan
+        v10 = vol[-10:].mean(axis=0, dtype=np.float64)
+        v20 = vol[-20:].mean(axis=0, dtype=np.float64)
+        vol_ratio = np.where(v20 > 0, v10 / v20, np.nan)
 
         # MA200 slope over ~1 month (20 trading days)
-        if len(ma200.dropna()) >= 21:
-            ma200_slope = (ma200.iloc[-1] / ma200.iloc[-21]) - 1.0
-        else:
-            ma200_slope = np.nan
-
-        return Metrics(
-            ticker=ticker,
-            name=name,
-            last_close=last_close,
-            ret_5=ret_5,
-            ret_20=ret_20,
-            ret_60=ret_60,
-            ret_120=ret_120,
-            ret_250=ret_250,
-            above_ma20=above_ma20,
-            above_ma50=above_ma50,
-            above_ma200=above_ma200,
-            ma200_slope_20d=ma200_slope,
-            prox_20h=prox_20h,
-            prox_52wh=prox_52wh,
-            vol_ratio_10_20=vol_ratio,
-        )
+        ma200_slope = ma200 / _tail_sma(csum, n_close, 200, offset=20) - 1.0
+
+    return (
+        n_close, last_close, ret_5, ret_20, ret_60, ret_120, ret_250,
+        above_ma20, above_ma50, above_ma200,
+        ma200_slope, prox_20h, prox_52wh, vol_ratio,
+    )
+
+
+def compute_metrics(panels: Panels, ticker_idx: Dict[str, int], use_numba: bool = False) -> np.ndarray:
+    """Compute metrics for every panel column.
+
+    The NumPy path is the default: for one run it beats numba's import and
+    JIT/cache-load cost. ``use_numba`` opts into ``_metrics_njit.compute_all``.
+    Returns a ``METRICS_DTYPE`` record array of the tickers with enough history.
+    """
+    tickers = list(ticker_idx)
+    if not tickers or panels["Close"].shape[0] == 0:
+        return np.empty(0, dtype=METRICS_DTYPE)
+
+    if use_numba:
+        from _metrics_njit import NUMBA_AVAILABLE, compute_all
+
+        if not NUMBA_AVAILABLE:
+            print("numba not installed; using the NumPy metrics path.", file=sys.stderr)
+            use_numba = False
+    if use_numba:
+        n_close, *columns = compute_all(panels["Close"], panels["High"], panels["Volume"])
+    else:
+        n_close, *columns = _compute_all_numpy(panels)
+
+    valid = n_close >= MIN_HISTORY
+    out = np.empty(int(valid.sum()), dtype=METRICS_DTYPE)
+    out["ticker"] = [tickers[j] for j in np.flatnonzero(valid)]
+    for f, c in zip(METRIC_FIELDS, columns):
+        out[f] = c[valid]
+    return out
+
+
+def _parquet_supported() -> bool:
+    return any(importlib.util.find_spec(mod) is not None for mod in ("pyarrow", "fastparquet"))
+
+
+def _cache_path(ticker: str) -> Path:
+    return CACHE_DIR / f"{ticker}.parquet"
+
+
+@lru_cache(maxsize=None)
+def _load_cached(ticker: str) -> Optional[pd.DataFrame]:
+    """Return the cached daily bars for ``ticker``, or None if absent/unreadable."""
+    path = _cache_path(ticker)
+    if not path.exists():
+        return None
+    try:
+        df = pd.read_parquet(path)
     except Exception:
         return None
+    return df if not df.empty else None
 
 
-def download_ohlcv(tickers: List[str], chunk_size: int = 150) -> pd.DataFrame:
-    frames: List[pd.DataFrame] = []
+def _store_cached(ticker: str, df: pd.DataFrame) -> None:
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(_cache_path(ticker), compression="zstd")
+    except Exception as exc:
+        print(f"Could not cache {ticker}: {exc}", file=sys.stderr)
 
-    for subset in chunked(tickers, chunk_size):
-        try:
-            df = yf.download(
-                tickers=subset,
-                period="2y",
-                interval="1d",
-                auto_adjust=True,
-                threads=True,
-                group_by="ticker",
-                progress=False,
-            )
-        except Exception as exc:
-            print(f"Download failed for chunk {subset}: {exc}", file=sys.stderr)
-            continue
 
-        if df.empty:
-            continue
+def _last_session_close() -> pd.Timestamp:
+    """Return the most recent weekday 15:30 JST (holidays are not accounted for)."""
+    now = pd.Timestamp.now(tz=MARKET_TZ)
+    close = now.normalize() + SESSION_CLOSE
+    if now < close:
+        close -= pd.Timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= pd.Timedelta(days=1)
+    return close
 
-        if not isinstance(df.columns, pd.MultiIndex):
-            # Single ticker response lacks leading level; add it back
-            df.columns = pd.MultiIndex.from_product([ [subset[0]], df.columns ])
-        frames.append(df)
 
-    if not frames:
-        return pd.DataFrame()
-
-    data = pd.concat(frames, axis=1)
-    data = data.loc[:, ~data.columns.duplicated()]
-    data = data.sort_index(axis=1)
-    return data
-
-
-def screen_short(metrics: List[Metrics]) -> List[Tuple[Metrics, float]]:
-    # Filters for short-term (1–4 weeks)
-    filtered = [
-        m for m in metrics
-        if m is not None
-        and m.above_ma20 and m.above_ma50
-        and (not math.isnan(m.prox_20h) and m.prox_20h >= 0.97)
-        and (not math.isnan(m.vol_ratio_10_20) and m.vol_ratio_10_20 >= 0.9)
-    ]
-    # Score emphasizing recent momentum and breakout proximity
-    out = []
-    for m in filtered:
-        r5 = 0.0 if math.isnan(m.ret_5) else m.ret_5
-        r20 = 0.0 if math.isnan(m.ret_20) else m.ret_20
-        prox20 = 0.0 if math.isnan(m.prox_20h) else (m.prox_20h - 0.95)
-        vr = 0.0 if math.isnan(m.vol_ratio_10_20) else min(m.vol_ratio_10_20, 2.0) - 1.0
-        score = (r5 * 100.0) + (r20 * 50.0) + (prox20 * 20.0) + (vr * 10.0)
-        out.append((m, score))
-    out.sort(key=lambda x: x[1], reverse=True)
+def _merge_cached(cached: pd.DataFrame, fresh: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Append ``fresh`` bars to ``cached``; None if the two no longer line up.
+
+    ``fresh`` is requested from the second-to-last cached bar, so the first
+    shared bar was final when cached. With ``auto_adjust`` a split or dividend
+    rescales all earlier bars, which shows up as a mismatch on that bar.
+    """
+    overlap = cached.index.intersection(fresh.index)
+    if len(overlap) == 0:
+        return None
+    first = overlap[0]
+    if not np.isclose(cached.at[first, "Close"], fresh.at[first, "Close"], rtol=1e-4):
+        return None
+    merged = pd.concat([cached[cached.index < fresh.index[0]], fresh])
+    cutoff = fresh.index[-1] - pd.DateOffset(years=2)
+    return merged[merged.index >= cutoff]
+
+
+def _download_chunk(subset: List[str], start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    span = {"start": start} if start is not None else {"period": "2y"}
+    df = yf.download(
+        tickers=subset,
+        interval="1d",
+        auto_adjust=True,
+        threads=False,
+        group_by="ticker",
+        progress=False,
+        **span,
+    )
+    if not df.empty and not isinstance(df.columns, pd.MultiIndex):
+        # Single ticker response lacks leading level; add it back
+        df.columns = pd.MultiIndex.from_product([ [subset[0]], df.columns ])
+    return df
+
+
+def _split_frame(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    out: Dict[str, pd.DataFrame] = {}
+    for ticker in df.columns.get_level_values(0).unique():
+        sub = df[ticker].dropna(how="all")
+        if not sub.empty:
+            out[ticker] = sub
     return out
 
 
-def screen_mid(metrics: List[Metrics]) -> List[Tuple[Metrics, float]]:
-    # Filters for mid-term (1–3 months)
-    filtered = [
-        m for m in metrics
-        if m is not None
-        and m.above_ma50 and m.above_ma200
-        and (not math.isnan(m.ma200_slope_20d) and m.ma200_slope_20d > 0)
-        and (not math.isnan(m.ret_60) and m.ret_60 > 0)
-    ]
-    out = []
-    for m in filtered:
-        r60 = 0.0 if math.isnan(m.ret_60) else m.ret_60
-        r120 = 0.0 if math.isnan(m.ret_120) else m.ret_120
-        prox52 = 0.0 if math.isnan(m.prox_52wh) else (m.prox_52wh - 0.9)
-        slope = 0.0 if math.isnan(m.ma200_slope_20d) else m.ma200_slope_20d
-        score = (r60 * 100.0) + (r120 * 50.0) + (prox52 * 15.0) + (slope * 30.0)
-        out.append((m, score))
-    out.sort(key=lambda x: x[1], reverse=True)
-    return out
+def _worker_chunks(tickers: List[str], chunk_size: int, max_workers: int) -> Iterable[List[str]]:
+    """Chunk ``tickers`` so every worker gets at least one chunk.
 
+    yfinance fetches each ticker of a ``threads=False`` call one after another,
+    so requests in flight = number of chunks running at once.
+    """
+    size = min(chunk_size, max(math.ceil(len(tickers) / max_workers), 1))
+    return chunked(tickers, size)
 
-def screen_long(metrics: List[Metrics]) -> List[Tuple[Metrics, float]]:
-    # Filters for long-term (6–24 months)
-    filtered = [
-        m for m in metrics
-        if m is not None
-        and m.above_ma200
-        and (not math.isnan(m.ma200_slope_20d) and m.ma200_slope_20d > 0)
-        and (not math.isnan(m.ret_250) and m.ret_250 > 0)
-    ]
-    out = []
-    for m in filtered:
-        r250 = 0.0 if math.isnan(m.ret_250) else m.ret_250
-        slope = 0.0 if math.isnan(m.ma200_slope_20d) else m.ma200_slope_20d
-        prox52 = 0.0 if math.isnan(m.prox_52wh) else (m.prox_52wh - 0.9)
-        score = (r250 * 80.0) + (slope * 40.0) + (prox52 * 20.0)
-        out.append((m, score))
-    out.sort(key=lambda x: x[1], reverse=True)
-    return out
+
+def _fetch(jobs: List[Tuple[List[str], Optional[pd.Timestamp]]], max_workers: int) -> Dict[str, pd.DataFrame]:
+    fetched: Dict[str, pd.DataFrame] = {}
+
+    # Chunks are independent HTTP fetches; run them concurrently and keep
+    # per-chunk threading off inside yfinance so workers bound concurrency.
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {ex.submit(_download_chunk, subset, start): subset for subset, start in jobs}
+        for future in as_completed(futures):
+            try:
+                df = future.result()
+            except Exception as exc:
+                print(f"Download failed for chunk {futures[future]}: {exc}", file=sys.stderr)
+                continue
+            if df.empty:
+                continue
+            fetched.update(_split_frame(df))
+    return fetched
+
+
+def download_ohlcv(
+    tickers: List[str],
+    chunk_size: int = 150,
+    max_workers: int = DEFAULT_WORKERS,
+    use_cache: bool = True,
+) -> Dict[str, pd.DataFrame]:
+    """Download ~2y of daily bars for ``tickers``, one frame per ticker.
+
+    With ``use_cache`` bars are kept under ``CACHE_DIR`` and only the days
+    after the last cached bar are requested from Yahoo Finance.
+    """
+    if use_cache and not _parquet_supported():
+        print("pyarrow/fastparquet not installed; OHLCV cache disabled.", file=sys.stderr)
+        use_cache = False
+
+    frames: Dict[str, pd.DataFrame] = {}
+    stale: Dict[pd.Timestamp, List[str]] = {}
+    missing: List[str] = []
+
+    last_close = _last_session_close()
+    for t in tickers:
+        cached = _load_cached(t) if use_cache else None
+        if cached is None:
+            missing.append(t)
+            continue
+        written = pd.Timestamp(_cache_path(t).stat().st_mtime, unit="s", tz="UTC")
+        if written >= last_close:
+            frames[t] = cached
+        else:
+            # Re-request the last cached bar too; it may have been intraday.
+            stale.setdefault(cached.index[max(len(cached) - 2, 0)], []).append(t)
+
+    jobs: List[Tuple[List[str], Optional[pd.Timestamp]]] = []
+    for start, group in stale.items():
+        jobs.extend((subset, start) for subset in _worker_chunks(group, chunk_size, max_workers))
+    fetched = _fetch(jobs, max_workers)
+
+    for t in (t for group in stale.values() for t in group):
+        cached = _load_cached(t)
+        if t not in fetched:
+            # A failed update keeps the stale bars rather than dropping the ticker.
+            print(f"No new bars for {t}; using cached data through {cached.index[-1].date()}.", file=sys.stderr)
+            frames[t] = cached
+            continue
+        merged = _merge_cached(cached, fetched[t])
+        if merged is None:
+            # History was re-adjusted since it was cached; fetch it in full.
+            missing.append(t)
+            continue
+        frames[t] = merged
+        _store_cached(t, merged)
+
+    jobs = [(subset, None) for subset in _worker_chunks(missing, chunk_size, max_workers)]
+    fetched = _fetch(jobs, max_workers)
+    for t, df in fetched.items():
+        frames[t] = df
+        if use_cache:
+            _store_cached(t, df)
+
+    return frames
+
+
+def _nz(x: np.ndarray) -> np.ndarray:
+    return np.nan_to_num(x, nan=0.0)
+
+
+def _screen_columns(M: np.ndarray) -> Dict[str, np.ndarray]:
+    """Metric fields plus the NaN-as-zero score terms shared by the screens."""
+    cols = {f: M[f] for f in METRIC_FIELDS}
+    cols.update(
+        r5=_nz(M["ret_5"]),
+        r20=_nz(M["ret_20"]),
+        r60=_nz(M["ret_60"]),
+        r120=_nz(M["ret_120"]),
+        r250=_nz(M["ret_250"]),
+        slope=_nz(M["ma200_slope_20d"]),
+        prox20=_nz(M["prox_20h"] - 0.95),
+        prox52=_nz(M["prox_52wh"] - 0.9),
+        vr=_nz(np.minimum(M["vol_ratio_10_20"], 2.0) - 1.0),
+    )
+    return cols
+
+
+def _top(mask: np.ndarray, score: np.ndarray, top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return indices and scores of the best ``top_n`` entries in ``mask``, best first.
+
+    O(N) selection via argpartition; ties rank in universe order, as the stable
+    full sort did. Scores are ranked as float64.
+    """
+    score = np.asarray(score, dtype=np.float64)
+    idx = np.flatnonzero(mask)
+    if top_n <= 0:
+        idx = idx[:0]
+    elif top_n < len(idx):
+        s = score[idx]
+        cutoff = s[np.argpartition(-s, top_n - 1)[top_n - 1]]
+        above = idx[s > cutoff]
+        idx = np.sort(np.concatenate([above, idx[s == cutoff][: top_n - len(above)]]))
+    idx = idx[np.argsort(-score[idx], kind="stable")]
+    return idx, score[idx]
+
+
+# (filter, score) per timeframe, over the columns from _screen_columns
+SCREENS: Dict[str, Tuple[Callable[[Dict[str, np.ndarray]], np.ndarray], ...]] = {
+    # Short-term (1–4 weeks): recent momentum and breakout proximity
+    "short": (
+        lambda c: c["above_ma20"] & c["above_ma50"] & (c["prox_20h"] >= 0.97) & (c["vol_ratio_10_20"] >= 0.9),
+        lambda c: c["r5"] * 100.0 + c["r20"] * 50.0 + c["prox20"] * 20.0 + c["vr"] * 10.0,
+    ),
+    # Mid-term (1–3 months)
+    "mid": (
+        lambda c: c["above_ma50"] & c["above_ma200"] & (c["ma200_slope_20d"] > 0) & (c["ret_60"] > 0),
+        lambda c: c["r60"] * 100.0 + c["r120"] * 50.0 + c["prox52"] * 15.0 + c["slope"] * 30.0,
+    ),
+    # Long-term (6–24 months)
+    "long": (
+        lambda c: c["above_ma200"] & (c["ma200_slope_20d"] > 0) & (c["ret_250"] > 0),
+        lambda c: c["r250"] * 80.0 + c["slope"] * 40.0 + c["prox52"] * 20.0,
+    ),
+}
+
+
+def screen_all(M: np.ndarray, top_n: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Run every screen in ``SCREENS`` over ``M``; returns timeframe -> (indices, scores)."""
+    cols = _screen_columns(M)
+    return {tf: _top(flt(cols), score(cols), top_n) for tf, (flt, score) in SCREENS.items()}
 
 
 def format_pct(x: float) -> str:
@@ -360,6 +566,11 @@ def format_pct(x: float) -> str:
     return f"{x*100:.1f}%"
 
 
+def format_pct_array(x: np.ndarray) -> np.ndarray:
+    """Vectorized ``format_pct`` over a float array."""
+    return np.where(np.isnan(x), "-", np.char.add(np.char.mod("%.1f", x * 100), "%"))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Screen Japanese equities across time horizons.")
     parser.add_argument(
@@ -378,7 +589,23 @@ def main():
         "--chunk-size",
         type=int,
         default=150,
-        help="Ticker batch size per Yahoo Finance request (default: 150).",
+        help="Maximum ticker batch size per Yahoo Finance request (default: 150).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of Yahoo Finance requests to run concurrently (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Ignore and do not update the OHLCV cache in {CACHE_DIR}.",
+    )
+    parser.add_argument(
+        "--numba",
+        action="store_true",
+        help="Compute metrics with the numba kernel (worth it only for very large panels).",
     )
     args = parser.parse_args()
 
@@ -399,103 +626,107 @@ def main():
     tickers = [t for t in tickers if t]
     print(f"Universe: {len(tickers)} tickers ({universe_label})")
 
-    data = download_ohlcv(tickers, chunk_size=args.chunk_size)
-    if data.empty:
+    frames = download_ohlcv(
+        tickers,
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        use_cache=not args.no_cache,
+    )
+    if not frames:
         print("No price data downloaded; aborting.")
         return
 
-    metrics: List[Metrics] = []
-    for t in tickers:
-        m = compute_metrics_for_ticker(data, t, name_map.get(t, t))
-        if m is not None:
-            metrics.append(m)
+    panels, ticker_idx = build_panels(frames, tickers)
+    M = compute_metrics(panels, ticker_idx, use_numba=args.numba)
 
-    print(f"Computed metrics for: {len(metrics)} tickers")
-    if not metrics:
+    print(f"Computed metrics for: {len(M)} tickers")
+    if not len(M):
         print("No securities passed the data sufficiency filters.")
         return
 
     top_n = max(args.top, 0)
-    short = screen_short(metrics)[:top_n]
-    mid = screen_mid(metrics)[:top_n]
-    long = screen_long(metrics)[:top_n]
+    screened = screen_all(M, top_n)
 
-    def explain(m: Metrics, tf: str) -> str:
+    def explain(m: np.void, tf: str) -> str:
         parts: List[str] = []
         # 共通: パフォーマンスと出来高
-        if not math.isnan(m.ret_5):
-            parts.append(f"直近5日 {format_pct(m.ret_5)}")
-        if not math.isnan(m.ret_20):
-            parts.append(f"1ヶ月 {format_pct(m.ret_20)}")
-        if not math.isnan(m.ret_60):
-            parts.append(f"3ヶ月 {format_pct(m.ret_60)}")
-        if not math.isnan(m.ret_120):
-            parts.append(f"6ヶ月 {format_pct(m.ret_120)}")
-        if not math.isnan(m.vol_ratio_10_20):
-            parts.append(f"出来高10/20日比 {m.vol_ratio_10_20:.2f}倍")
+        if not math.isnan(m["ret_5"]):
+            parts.append(f"直近5日 {format_pct(m['ret_5'])}")
+        if not math.isnan(m["ret_20"]):
+            parts.append(f"1ヶ月 {format_pct(m['ret_20'])}")
+        if not math.isnan(m["ret_60"]):
+            parts.append(f"3ヶ月 {format_pct(m['ret_60'])}")
+        if not math.isnan(m["ret_120"]):
+            parts.append(f"6ヶ月 {format_pct(m['ret_120'])}")
+        if not math.isnan(m["vol_ratio_10_20"]):
+            parts.append(f"出来高10/20日比 {m['vol_ratio_10_20']:.2f}倍")
 
         # 高値接近度
-        if not math.isnan(m.prox_20h):
-            if m.prox_20h >= 0.99:
+        if not math.isnan(m["prox_20h"]):
+            if m["prox_20h"] >= 0.99:
                 parts.append("20日高値圏(±1%)")
             else:
-                parts.append(f"20日高値まであと {(1-m.prox_20h)*100:.1f}%")
-        if not math.isnan(m.prox_52wh):
-            if m.prox_52wh >= 1.0:
+                parts.append(f"20日高値まであと {(1-m['prox_20h'])*100:.1f}%")
+        if not math.isnan(m["prox_52wh"]):
+            if m["prox_52wh"] >= 1.0:
                 parts.append("52週高値更新")
-            elif m.prox_52wh >= 0.97:
+            elif m["prox_52wh"] >= 0.97:
                 parts.append("52週高値圏(±3%)")
             else:
-                parts.append(f"52週高値まであと {(1-m.prox_52wh)*100:.1f}%")
+                parts.append(f"52週高値まであと {(1-m['prox_52wh'])*100:.1f}%")
 
         # トレンド条件
         if tf == "short":
-            if m.above_ma20 and m.above_ma50:
+            if m["above_ma20"] and m["above_ma50"]:
                 parts.append("20/50日線上")
         elif tf == "mid":
-            if m.above_ma50 and m.above_ma200:
+            if m["above_ma50"] and m["above_ma200"]:
                 parts.append("50/200日線上")
-            if not math.isnan(m.ma200_slope_20d) and m.ma200_slope_20d > 0:
-                parts.append(f"200日線上向き({m.ma200_slope_20d*100:.1f}%/20日)")
+            if not math.isnan(m["ma200_slope_20d"]) and m["ma200_slope_20d"] > 0:
+                parts.append(f"200日線上向き({m['ma200_slope_20d']*100:.1f}%/20日)")
         elif tf == "long":
-            if m.above_ma200:
+            if m["above_ma200"]:
                 parts.append("200日線上")
-            if not math.isnan(m.ma200_slope_20d) and m.ma200_slope_20d > 0:
-                parts.append(f"200日線上向き({m.ma200_slope_20d*100:.1f}%/20日)")
-            if not math.isnan(m.ret_250):
-                parts.append(f"12ヶ月 {format_pct(m.ret_250)}")
+            if not math.isnan(m["ma200_slope_20d"]) and m["ma200_slope_20d"] > 0:
+                parts.append(f"200日線上向き({m['ma200_slope_20d']*100:.1f}%/20日)")
+            if not math.isnan(m["ret_250"]):
+                parts.append(f"12ヶ月 {format_pct(m['ret_250'])}")
 
         return "、".join(parts)
 
-    def print_list(title: str, lst: List[Tuple[Metrics, float]]):
+    def print_list(title: str, tf: str):
         print(f"\n{title}")
         print("ticker | name | 5d | 1m | 3m | 6m | 52w% | vol10/20 | note")
-        if not lst:
+        idx, _ = screened[tf]
+        if not len(idx):
             print("(no candidates)")
             return
-        for m, score in lst:
+        sel = M[idx]
+        # Format the table columns once for all rows
+        pct = {f: format_pct_array(sel[f]) for f in ("ret_5", "ret_20", "ret_60", "ret_120")}
+        prox52_delta = format_pct_array(sel["prox_52wh"] - 1)
+        vol_ratio = np.char.mod("%.2f", sel["vol_ratio_10_20"])
+        for i, m in enumerate(sel):
             note_parts = []
-            if not math.isnan(m.prox_20h) and m.prox_20h >= NEAR_20D:
+            if not math.isnan(m["prox_20h"]) and m["prox_20h"] >= NEAR_20D:
                 note_parts.append("20日高値圏")
-            if not math.isnan(m.prox_52wh) and m.prox_52wh >= NEAR_52W:
+            if not math.isnan(m["prox_52wh"]) and m["prox_52wh"] >= NEAR_52W:
                 note_parts.append("52週高値圏")
-            if not math.isnan(m.vol_ratio_10_20) and m.vol_ratio_10_20 >= 1.1:
+            if not math.isnan(m["vol_ratio_10_20"]) and m["vol_ratio_10_20"] >= 1.1:
                 note_parts.append("出来高↑")
             note = ",".join(note_parts)
-            prox52_delta = m.prox_52wh - 1 if not math.isnan(m.prox_52wh) else np.nan
             print(
-                f"{m.ticker} | {m.name} | "
-                f"{format_pct(m.ret_5)} | {format_pct(m.ret_20)} | {format_pct(m.ret_60)} | {format_pct(m.ret_120)} | "
-                f"{format_pct(prox52_delta)} | "
-                f"{m.vol_ratio_10_20:.2f} | {note}"
+                f"{m['ticker']} | {name_map.get(m['ticker'], m['ticker'])} | "
+                f"{pct['ret_5'][i]} | {pct['ret_20'][i]} | {pct['ret_60'][i]} | {pct['ret_120'][i]} | "
+                f"{prox52_delta[i]} | "
+                f"{vol_ratio[i]} | {note}"
             )
             # 選定根拠を追記
-            print("  根拠: " + explain(m, "short" if title.startswith("Short-term") else ("mid" if title.startswith("Mid-term") else "long")))
-
-    print_list("Short-term candidates (1–4 weeks):", short)
-    print_list("Mid-term candidates (1–3 months):", mid)
-    print_list("Long-term candidates (6–24 months):", long)
+            print("  根拠: " + explain(m, tf))
 
+    print_list("Short-term candidates (1–4 weeks):", "short")
+    print_list("Mid-term candidates (1–3 months):", "mid")
+    print_list("Long-term candidates (6–24 months):", "long")
 
 if __name__ == "__main__":
     main()